@@ -1,6 +1,25 @@
+import multiprocessing
 import random
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor, wait
 from typing import Tuple, Dict, Optional, List, Set
 from board import Board
+from book import OpeningBook
+from evaluation import EvaluationCache, IncrementalEvaluator, PatternEvaluator, ThreatAnalysis
+from transposition import SharedTranspositionTable, TableCache, TranspositionTable
+from ordering import MoveOrderer
+from solver import Solver
+
+try:
+    from batch_eval import BatchEvaluator
+except ImportError:
+    BatchEvaluator = None
+
+
+class SearchAborted(Exception):
+    pass
 
 
 class AI:
@@ -9,31 +28,108 @@ class AI:
     EXACT = 0
     LOWER_BOUND = 1
     UPPER_BOUND = 2
+    WIN_SCORE = 100000
+    TIME_CHECK_INTERVAL = 64
+    WORKER_POLL_INTERVAL = 0.05
+    SOLVER_TIME_SHARE = 0.5
+    SEARCH_COUNTERS = ('nodes', 'researches', 'aspiration_failures', 'reductions', 'reduction_researches',
+                       'extensions')
+    PERSPECTIVE_KEYS = {Board.PLAYER1: 0, Board.PLAYER2: 0x9E3779B97F4A7C15}
+    LINE_EVALUATORS = ('incremental', 'pattern', 'windows')
+    SEARCH_ENGINES = ('minimax', 'pvs')
+    ASPIRATION_WINDOW = 50
     
-    def __init__(self, player: int):
+    def __init__(self, player: int, use_symmetry: bool = True, time_limit: Optional[float] = None,
+                 transposition_table: Optional[TranspositionTable] = None, workers: int = 1,
+                 solver_threshold: int = 16, depth: Optional[int] = None, book_path: Optional[str] = None,
+                 cache_path: Optional[str] = None, line_evaluator: str = 'incremental',
+                 eval_cache_entries: int = EvaluationCache.DEFAULT_ENTRIES, batch_leaves: bool = False,
+                 search: str = 'minimax', lmr_reduction: int = 0, lmr_min_moves: int = 3, lmr_min_depth: int = 3,
+                 extension_limit: int = 0):
+        if line_evaluator not in self.LINE_EVALUATORS:
+            raise ValueError(f"line_evaluator must be one of {', '.join(self.LINE_EVALUATORS)}")
+        if search not in self.SEARCH_ENGINES:
+            raise ValueError(f"search must be one of {', '.join(self.SEARCH_ENGINES)}")
+        if batch_leaves and BatchEvaluator is None:
+            raise ImportError("batch_leaves requires numpy")
         self.player = player
+        self.use_symmetry = use_symmetry
+        self.time_limit = time_limit
+        self.workers = workers
+        self.solver_threshold = solver_threshold
+        self.solver = Solver()
+        self.last_solved_score: Optional[int] = None
+        self.depth = depth
+        self.book = OpeningBook(book_path) if book_path is not None else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shared_alpha = None
+        self._abort_event = None
+        self.search = search
+        self.lmr_reduction = lmr_reduction
+        self.lmr_min_moves = max(1, lmr_min_moves)
+        self.lmr_min_depth = lmr_min_depth
+        self.extension_limit = extension_limit
+        self._reset_counters()
+        self._horizon = 0
+        self._deadline: Optional[float] = None
+        self._stop_event: Optional[threading.Event] = None
         self.opponent = Board.PLAYER1 if player == Board.PLAYER2 else Board.PLAYER2
-        self.transposition_table: Dict[int, Tuple[float, int, int]] = {}
+        self.transposition_table = transposition_table if transposition_table is not None else TranspositionTable()
+        self.table_cache = TableCache(cache_path, Board.ZOBRIST_SEED) if cache_path is not None else None
+        self._cache_loaded = False
+        self._cache_finalizer = None
+        if self.table_cache is not None:
+            self._cache_finalizer = weakref.finalize(self, self.table_cache.save, self.transposition_table)
         self.move_order = [3, 2, 4, 1, 5, 0, 6]
+        self.move_orderer = MoveOrderer()
+        self.line_evaluator = line_evaluator
+        self.evaluator = IncrementalEvaluator(player)
+        self.pattern_evaluator = PatternEvaluator(player)
+        self.eval_cache = EvaluationCache(eval_cache_entries) if eval_cache_entries > 0 else None
+        self.batch_evaluator = BatchEvaluator(player) if batch_leaves else None
         self.player_is_first = (player == Board.PLAYER1)
 
+    def _reset_counters(self):
+        for name in self.SEARCH_COUNTERS:
+            setattr(self, name, 0)
+
+    def _counters(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.SEARCH_COUNTERS}
+
+    def _add_counters(self, counters: Dict[str, int]):
+        for name, value in counters.items():
+            setattr(self, name, getattr(self, name) + value)
+
     def _board_hash(self, board: Board) -> int:
-        h = 0
-        for row in range(Board.ROWS):
-            for col in range(Board.COLS):
-                h = h * 3 + board.grid[row][col]
-        return h
+        if self.use_symmetry:
+            return board.canonical_key() ^ self.PERSPECTIVE_KEYS[self.player]
+        return board.hash_key ^ self.PERSPECTIVE_KEYS[self.player]
 
-    def _count_pieces(self, board: Board) -> int:
-        count = 0
-        for row in range(Board.ROWS):
-            for col in range(Board.COLS):
-                if board.grid[row][col] != Board.EMPTY:
-                    count += 1
-        return count
+    def _orient_move(self, board: Board, col: int) -> int:
+        if col >= 0 and self.use_symmetry and board.mirror_key < board.hash_key:
+            return Board.COLS - 1 - col
+        return col
+
+    def _make_move(self, board: Board, col: int, player: int):
+        row = board.get_row_for_column(col)
+        board.drop_piece(col, player)
+        self.evaluator.add(row, col, player)
+
+    def _unmake_move(self, board: Board):
+        col = board.move_history[-1]
+        row = board.get_row_for_column(col) + 1
+        player = board.grid[row][col]
+        board.undo_move()
+        self.evaluator.remove(row, col, player)
+
+    def _tt_move(self, board: Board) -> int:
+        entry = self.transposition_table.probe(self._board_hash(board))
+        return self._orient_move(board, entry[3]) if entry is not None else -1
 
     def _get_dynamic_depth(self, board: Board) -> int:
-        pieces = self._count_pieces(board)
+        if self.depth is not None:
+            return self.depth
+        pieces = board.move_count
         if pieces <= 8:
             return self.MIN_DEPTH
         elif pieces <= 20:
@@ -43,228 +139,338 @@ class AI:
         else:
             return self.MAX_DEPTH
 
-    def _get_playable_row(self, board: Board, col: int) -> int:
-        for row in range(Board.ROWS - 1, -1, -1):
-            if board.grid[row][col] == Board.EMPTY:
-                return row
-        return -1
-
-    def _find_threats(self, board: Board, player: int) -> List[Tuple[int, int, bool]]:
-        threats = []
-        
-        for row in range(Board.ROWS):
-            for col in range(Board.COLS - 3):
-                window = [(row, col + i) for i in range(4)]
-                cells = [board.grid[r][c] for r, c in window]
-                if cells.count(player) == 3 and cells.count(Board.EMPTY) == 1:
-                    empty_idx = cells.index(Board.EMPTY)
-                    threat_row, threat_col = window[empty_idx]
-                    is_odd = (Board.ROWS - 1 - threat_row) % 2 == 1
-                    threats.append((threat_row, threat_col, is_odd))
-        
-        for row in range(Board.ROWS - 3):
-            for col in range(Board.COLS):
-                window = [(row + i, col) for i in range(4)]
-                cells = [board.grid[r][c] for r, c in window]
-                if cells.count(player) == 3 and cells.count(Board.EMPTY) == 1:
-                    empty_idx = cells.index(Board.EMPTY)
-                    threat_row, threat_col = window[empty_idx]
-                    is_odd = (Board.ROWS - 1 - threat_row) % 2 == 1
-                    threats.append((threat_row, threat_col, is_odd))
-        
-        for row in range(Board.ROWS - 3):
-            for col in range(Board.COLS - 3):
-                window = [(row + i, col + i) for i in range(4)]
-                cells = [board.grid[r][c] for r, c in window]
-                if cells.count(player) == 3 and cells.count(Board.EMPTY) == 1:
-                    empty_idx = cells.index(Board.EMPTY)
-                    threat_row, threat_col = window[empty_idx]
-                    is_odd = (Board.ROWS - 1 - threat_row) % 2 == 1
-                    threats.append((threat_row, threat_col, is_odd))
+    def _score_threats(self, analysis: ThreatAnalysis, player: int, playable_score: int,
+                       favorable: Tuple[int, int, int], unfavorable: Tuple[int, int, int]) -> float:
+        score = 0.0
+        if player == Board.PLAYER1:
+            favorable_cells, unfavorable_cells = ThreatAnalysis.ODD_HEIGHTS, ThreatAnalysis.EVEN_HEIGHTS
+        else:
+            favorable_cells, unfavorable_cells = ThreatAnalysis.EVEN_HEIGHTS, ThreatAnalysis.ODD_HEIGHTS
         
-        for row in range(3, Board.ROWS):
-            for col in range(Board.COLS - 3):
-                window = [(row - i, col + i) for i in range(4)]
-                cells = [board.grid[r][c] for r, c in window]
-                if cells.count(player) == 3 and cells.count(Board.EMPTY) == 1:
-                    empty_idx = cells.index(Board.EMPTY)
-                    threat_row, threat_col = window[empty_idx]
-                    is_odd = (Board.ROWS - 1 - threat_row) % 2 == 1
-                    threats.append((threat_row, threat_col, is_odd))
+        for threats in analysis.threats[player]:
+            score += playable_score * self._popcount(threats & analysis.layers[0])
+            for distance in range(1, Board.ROWS):
+                cells = threats & analysis.layers[distance]
+                if not cells:
+                    continue
+                for region, (base, step, floor) in ((favorable_cells, favorable), (unfavorable_cells, unfavorable)):
+                    score += max(base - distance * step, floor) * self._popcount(cells & region)
         
-        return threats
+        return score
 
-    def _is_threat_playable(self, board: Board, threat_row: int, threat_col: int) -> bool:
-        playable_row = self._get_playable_row(board, threat_col)
-        return playable_row == threat_row
+    @staticmethod
+    def _popcount(mask: int) -> int:
+        return bin(mask).count('1')
 
-    def _evaluate_threats(self, board: Board) -> float:
-        score = 0.0
+    def _evaluate_threats(self, board: Board, analysis: Optional[ThreatAnalysis] = None) -> float:
+        if analysis is None:
+            analysis = ThreatAnalysis(board)
         
-        my_threats = self._find_threats(board, self.player)
-        opp_threats = self._find_threats(board, self.opponent)
+        score = self._score_threats(analysis, self.player, 200, (60, 8, 10), (30, 5, 5))
+        score -= self._score_threats(analysis, self.opponent, 180, (55, 8, 8), (25, 5, 3))
         
-        for threat_row, threat_col, is_odd in my_threats:
-            if self._is_threat_playable(board, threat_row, threat_col):
-                score += 200
-            else:
-                playable_row = self._get_playable_row(board, threat_col)
-                if playable_row >= 0 and playable_row > threat_row:
-                    distance = playable_row - threat_row
-                    is_favorable = (self.player == Board.PLAYER1 and is_odd) or \
-                                   (self.player == Board.PLAYER2 and not is_odd)
-                    if is_favorable:
-                        score += max(60 - distance * 8, 10)
-                    else:
-                        score += max(30 - distance * 5, 5)
-        
-        for threat_row, threat_col, is_odd in opp_threats:
-            if self._is_threat_playable(board, threat_row, threat_col):
-                score -= 180
-            else:
-                playable_row = self._get_playable_row(board, threat_col)
-                if playable_row >= 0 and playable_row > threat_row:
-                    distance = playable_row - threat_row
-                    is_favorable = (self.opponent == Board.PLAYER1 and is_odd) or \
-                                   (self.opponent == Board.PLAYER2 and not is_odd)
-                    if is_favorable:
-                        score -= max(55 - distance * 8, 8)
-                    else:
-                        score -= max(25 - distance * 5, 3)
-        
-        double_threats = {}
-        for threat_row, threat_col, is_odd in my_threats:
-            key = threat_col
-            if key not in double_threats:
-                double_threats[key] = []
-            double_threats[key].append(threat_row)
-        
-        for col, rows in double_threats.items():
-            if len(rows) >= 2:
-                rows_sorted = sorted(rows)
-                for i in range(len(rows_sorted) - 1):
-                    if rows_sorted[i + 1] - rows_sorted[i] == 1:
-                        score += 150
+        my_threats = analysis.masks[self.player]
+        score += 150 * self._popcount(my_threats & (my_threats >> 1))
         
         return score
 
-    def _detect_zugzwang(self, board: Board) -> float:
-        score = 0.0
-        
-        my_threats = self._find_threats(board, self.player)
-        opp_threats = self._find_threats(board, self.opponent)
-        
-        opp_threat_positions = set((r, c) for r, c, _ in opp_threats)
-        
-        for col in range(Board.COLS):
-            playable_row = self._get_playable_row(board, col)
-            if playable_row < 0 or playable_row == 0:
-                continue
-            
-            above_row = playable_row - 1
-            
-            for threat_row, threat_col, is_odd in opp_threats:
-                if threat_col == col and threat_row == above_row:
-                    score -= 100
-                    break
-            
-            for threat_row, threat_col, is_odd in my_threats:
-                if threat_col == col and threat_row == above_row:
-                    score += 90
-                    break
+    def _detect_zugzwang(self, board: Board, analysis: Optional[ThreatAnalysis] = None) -> float:
+        if analysis is None:
+            analysis = ThreatAnalysis(board)
         
-        for row, col, is_odd in my_threats:
-            playable = self._get_playable_row(board, col)
-            if playable >= 0 and playable < row:
-                cells_between = row - playable
-                if cells_between % 2 == 0:
-                    has_opp_threat_between = False
-                    for check_row in range(playable, row):
-                        if (check_row, col) in opp_threat_positions:
-                            has_opp_threat_between = True
-                            break
-                    if not has_opp_threat_between:
-                        is_favorable = (self.player == Board.PLAYER1 and is_odd) or \
-                                       (self.player == Board.PLAYER2 and not is_odd)
-                        if is_favorable:
-                            score += 120
+        score = -100.0 * self._popcount(analysis.masks[self.opponent] & analysis.above_playable)
+        score += 90 * self._popcount(analysis.masks[self.player] & analysis.above_playable)
         
         return score
 
-    def _order_moves(self, board: Board, valid_moves: list, is_maximizing: bool) -> list:
-        move_scores = []
-        player = self.player if is_maximizing else self.opponent
-        
-        for col in valid_moves:
-            score = 0
-            
-            if col == 3:
-                score += 10
-            elif col in [2, 4]:
-                score += 5
-            elif col in [1, 5]:
-                score += 2
-            
-            new_board = board.copy()
-            new_board.drop_piece(col, player)
-            if new_board.check_winner() == player:
-                score += 1000
-            
-            opponent = self.opponent if is_maximizing else self.player
-            test_board = board.copy()
-            test_board.drop_piece(col, opponent)
-            if test_board.check_winner() == opponent:
-                score += 500
-            
-            move_scores.append((col, score))
-        
-        move_scores.sort(key=lambda x: x[1], reverse=True)
-        return [col for col, _ in move_scores]
+    def get_move(self, board: Board, time_limit: Optional[float] = None,
+                 stop_event: Optional[threading.Event] = None) -> int:
+        self.new_search()
+        return self.find_move(board, time_limit, stop_event)
 
-    def get_move(self, board: Board) -> int:
+    def new_search(self):
+        if self.table_cache is not None and not self._cache_loaded:
+            self.table_cache.load_into(self.transposition_table)
+            self._cache_loaded = True
+        self.transposition_table.new_search()
+        self.move_orderer.age()
+
+    def find_move(self, board: Board, time_limit: Optional[float] = None,
+                  stop_event: Optional[threading.Event] = None) -> int:
+        # Runs in the current table generation; see new_search.
+        if time_limit is None:
+            time_limit = self.time_limit
+        started = time.time()
+        self._reset_counters()
+        self.last_solved_score = None
         valid_moves = board.get_valid_moves()
         if len(valid_moves) == 1:
             return valid_moves[0]
         
         for col in valid_moves:
-            new_board = board.copy()
-            new_board.drop_piece(col, self.player)
-            if new_board.check_winner() == self.player:
+            board.drop_piece(col, self.player)
+            winner = board.check_last_move_winner()
+            board.undo_move()
+            if winner == self.player:
                 return col
         
         for col in valid_moves:
-            new_board = board.copy()
-            new_board.drop_piece(col, self.opponent)
-            if new_board.check_winner() == self.opponent:
+            board.drop_piece(col, self.opponent)
+            winner = board.check_last_move_winner()
+            board.undo_move()
+            if winner == self.opponent:
+                return col
+        
+        if self.book is not None:
+            col = self.book.lookup(board)
+            if col in valid_moves:
                 return col
         
-        depth = self._get_dynamic_depth(board)
+        if self.use_symmetry and board.is_symmetric():
+            valid_moves = [col for col in valid_moves if col <= Board.COLS // 2]
+        
+        if Board.ROWS * Board.COLS - board.move_count <= self.solver_threshold:
+            col = self._solve_move(board, valid_moves, time_limit, stop_event)
+            if col >= 0:
+                return col
+            if time_limit is not None:
+                time_limit = max(0.0, time_limit - (time.time() - started))
+        
+        ordered_moves = self.move_orderer.order(board, valid_moves, self.player, self._tt_move(board))
+        
+        if time_limit is None and stop_event is None:
+            _, best_moves = self._search_root(board, ordered_moves, self._get_dynamic_depth(board))
+        elif time_limit is None:
+            best_moves = self._iterative_deepening(board, ordered_moves, None, stop_event,
+                                                   self._get_dynamic_depth(board))
+        else:
+            best_moves = self._iterative_deepening(board, ordered_moves, time_limit, stop_event,
+                                                   Board.ROWS * Board.COLS - board.move_count)
+        
+        return self._choose_move(best_moves) if best_moves else ordered_moves[0]
+
+    def _solve_move(self, board: Board, valid_moves: List[int], time_limit: Optional[float] = None,
+                    stop_event: Optional[threading.Event] = None) -> int:
+        if time_limit is None and stop_event is None:
+            scores = self.solver.analyze(board)
+        else:
+            self._deadline = time.time() + time_limit * self.SOLVER_TIME_SHARE if time_limit is not None else None
+            self._stop_event = stop_event
+            try:
+                scores = self.solver.analyze(board, self._check_interrupted)
+            except SearchAborted:
+                return -1
+            finally:
+                self._deadline = None
+                self._stop_event = None
+        best_score = max(scores[col] for col in valid_moves)
+        self.last_solved_score = best_score
+        best_moves = [col for col in Solver.COLUMN_ORDER if col in valid_moves and scores[col] == best_score]
+        return best_moves[0]
+
+    def _iterative_deepening(self, board: Board, ordered_moves: List[int], time_limit: Optional[float],
+                             stop_event: Optional[threading.Event], max_depth: int) -> List[int]:
+        self._deadline = time.time() + time_limit if time_limit is not None else None
+        self._stop_event = stop_event
+        root_ply = board.move_count
+        best_moves: List[int] = []
+        best_score: Optional[float] = None
+        try:
+            for depth in range(1, max_depth + 1):
+                best_score, best_moves = self._search_root(board, ordered_moves, depth, best_score)
+                ordered_moves = [best_moves[0]] + [col for col in ordered_moves if col != best_moves[0]]
+                if abs(best_score) >= self.WIN_SCORE:
+                    break
+        except SearchAborted:
+            while board.move_count > root_ply:
+                self._unmake_move(board)
+        finally:
+            self._deadline = None
+            self._stop_event = None
+        return best_moves
+
+    def _check_interrupted(self):
+        if self._search_interrupted():
+            raise SearchAborted()
+
+    def _search_interrupted(self) -> bool:
+        if self._stop_event is not None and self._stop_event.is_set():
+            return True
+        return self._deadline is not None and time.time() > self._deadline
+
+    def _search_root(self, board: Board, ordered_moves: List[int], depth: int,
+                     guess: Optional[float] = None) -> Tuple[float, List[int]]:
         best_score = float('-inf')
         best_moves = []
+        self._horizon = board.move_count + depth + self.extension_limit
         
-        ordered_moves = self._order_moves(board, valid_moves, True)
+        if self.workers > 1:
+            root_scores = self._parallel_root_scores(board, ordered_moves, depth)
+        elif self.search == 'pvs':
+            root_scores = self._pvs_root_scores(board, ordered_moves, depth, guess)
+        else:
+            root_scores = self._serial_root_scores(board, ordered_moves, depth)
         
-        for col in ordered_moves:
-            new_board = board.copy()
-            new_board.drop_piece(col, self.player)
-            score = self._minimax(new_board, depth - 1, float('-inf'), float('inf'), False)
-            
+        for col, score in root_scores:
             if score > best_score:
                 best_score = score
                 best_moves = [col]
             elif score == best_score:
                 best_moves.append(col)
         
+        self.transposition_table.store(self._board_hash(board), best_score, depth, self.EXACT,
+                                       self._orient_move(board, self._choose_move(best_moves)))
+        return best_score, best_moves
+
+    def _serial_root_scores(self, board: Board, ordered_moves: List[int], depth: int) -> List[Tuple[int, float]]:
+        root_scores = []
+        self.evaluator.reset(board)
+        for col in ordered_moves:
+            self._make_move(board, col, self.player)
+            root_scores.append((col, self._minimax(board, depth - 1, float('-inf'), float('inf'), False)))
+            self._unmake_move(board)
+        return root_scores
+
+    def _pvs_root_scores(self, board: Board, ordered_moves: List[int], depth: int,
+                         guess: Optional[float]) -> List[Tuple[int, float]]:
+        self.evaluator.reset(board)
+        if guess is not None and abs(guess) < self.WIN_SCORE:
+            root_scores = self._pvs_root_window(board, ordered_moves, depth, guess - self.ASPIRATION_WINDOW,
+                                                guess + self.ASPIRATION_WINDOW)
+            if root_scores is not None:
+                return root_scores
+            self.aspiration_failures += 1
+        return self._pvs_root_window(board, ordered_moves, depth, float('-inf'), float('inf'))
+
+    def _pvs_root_window(self, board: Board, ordered_moves: List[int], depth: int, alpha: float,
+                         beta: float) -> Optional[List[Tuple[int, float]]]:
+        # Later root moves are tested against best_score - 1 rather than
+        # best_score so that ties still get exact scores for _choose_move.
+        root_scores = []
+        best_score = float('-inf')
+        for col in ordered_moves:
+            self._make_move(board, col, self.player)
+            if not root_scores:
+                score = -self._pvs(board, depth - 1, -beta, -alpha, -1)
+                failed = score <= alpha or score >= beta
+            else:
+                score = -self._pvs(board, depth - 1, -best_score, 1 - best_score, -1)
+                failed = False
+                if score >= best_score:
+                    self.researches += 1
+                    score = -self._pvs(board, depth - 1, -beta, 1 - best_score, -1)
+                    failed = score >= beta
+            self._unmake_move(board)
+            if failed:
+                return None
+            root_scores.append((col, score))
+            best_score = max(best_score, score)
+        return root_scores
+
+    def _parallel_root_scores(self, board: Board, ordered_moves: List[int], depth: int) -> List[Tuple[int, float]]:
+        executor = self._get_executor()
+        self._shared_alpha.value = float('-inf')
+        self._abort_event.clear()
+        history = board.move_history[:]
+        first = executor.submit(_search_root_move, history, ordered_moves[0], depth, self._deadline)
+        futures = [first]
+        try:
+            self._await_worker(first)
+            futures += [executor.submit(_search_root_move, history, col, depth, self._deadline)
+                        for col in ordered_moves[1:]]
+            for future in futures[1:]:
+                self._await_worker(future)
+        except SearchAborted:
+            self._abort_event.set()
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            for future in futures:
+                if not future.cancelled():
+                    self._add_counters(future.result()[2])
+            raise
+        root_scores = []
+        for future in futures:
+            col, score, counters = future.result()
+            self._add_counters(counters)
+            root_scores.append((col, score))
+        if any(score is None for _, score in root_scores):
+            raise SearchAborted()
+        return root_scores
+
+    def _await_worker(self, future: Future):
+        while not wait([future], timeout=self.WORKER_POLL_INTERVAL).done:
+            if self._search_interrupted():
+                raise SearchAborted()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._shared_alpha = multiprocessing.Value('d', float('-inf'))
+            self._abort_event = multiprocessing.Event()
+            table_name = None
+            if isinstance(self.transposition_table, SharedTranspositionTable):
+                table_name = self.transposition_table.name
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_search_worker,
+                initargs=(self.player, self._worker_options(), self._shared_alpha, self._abort_event, table_name))
+        return self._executor
+
+    def _worker_options(self) -> Dict:
+        return {
+            'use_symmetry': self.use_symmetry,
+            'line_evaluator': self.line_evaluator,
+            'eval_cache_entries': self.eval_cache.max_entries if self.eval_cache is not None else 0,
+            'batch_leaves': self.batch_evaluator is not None,
+            'search': self.search,
+            'lmr_reduction': self.lmr_reduction,
+            'lmr_min_moves': self.lmr_min_moves,
+            'lmr_min_depth': self.lmr_min_depth,
+            'extension_limit': self.extension_limit,
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._cache_finalizer is not None:
+            self._cache_finalizer()
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+
+    def _choose_move(self, best_moves: List[int]) -> int:
         center_moves = [m for m in best_moves if m == 3]
         if center_moves:
             return center_moves[0]
-        return best_moves[0] if best_moves else valid_moves[0]
+        return best_moves[0]
+
+    def get_principal_variation(self, board: Board, max_length: Optional[int] = None) -> List[int]:
+        line = board.copy()
+        variation: List[int] = []
+        player = self.player if line.move_count % 2 == self.player - 1 else self.opponent
+        while max_length is None or len(variation) < max_length:
+            col = self._tt_move(line)
+            if col < 0 or not line.is_valid_move(col):
+                break
+            line.drop_piece(col, player)
+            variation.append(col)
+            if line.check_last_move_winner() != Board.EMPTY or line.is_full():
+                break
+            player = self.opponent if player == self.player else self.player
+        return variation
 
     def _minimax(self, board: Board, depth: int, alpha: float, beta: float, is_maximizing: bool) -> float:
+        self.nodes += 1
+        if self.nodes % self.TIME_CHECK_INTERVAL == 0 and self._search_interrupted():
+            raise SearchAborted()
+        
         board_hash = self._board_hash(board)
         
-        if board_hash in self.transposition_table:
-            stored_score, stored_depth, flag = self.transposition_table[board_hash]
+        entry = self.transposition_table.probe(board_hash)
+        tt_move = -1
+        if entry is not None:
+            stored_score, stored_depth, flag, tt_move = entry
+            tt_move = self._orient_move(board, tt_move)
             if stored_depth >= depth:
                 if flag == self.EXACT:
                     return stored_score
@@ -275,28 +481,46 @@ class AI:
                 if alpha >= beta:
                     return stored_score
         
-        winner = board.check_winner()
+        winner = board.check_last_move_winner()
         if winner == self.player:
-            return 100000 + depth
+            return self.WIN_SCORE + depth
         if winner == self.opponent:
-            return -100000 - depth
+            return -self.WIN_SCORE - depth
         if board.is_full() or depth == 0:
-            return self._evaluate_board(board)
+            return self._cached_evaluation(board, board_hash)
         
-        valid_moves = board.get_valid_moves()
-        ordered_moves = self._order_moves(board, valid_moves, is_maximizing)
+        ply = board.move_count
+        player = self.player if is_maximizing else self.opponent
+        ordered_moves = self.move_orderer.order(board, board.get_valid_moves(), player, tt_move)
+        
+        if depth == 1 and self.batch_evaluator is not None:
+            return self._minimax_frontier(board, board_hash, ordered_moves, alpha, beta, is_maximizing)
         
         original_alpha = alpha
+        original_beta = beta
         
         if is_maximizing:
             max_eval = float('-inf')
-            for col in ordered_moves:
-                new_board = board.copy()
-                new_board.drop_piece(col, self.player)
-                eval_score = self._minimax(new_board, depth - 1, alpha, beta, False)
-                max_eval = max(max_eval, eval_score)
+            best_col = -1
+            for index, col in enumerate(ordered_moves):
+                reduction = self._late_move_reduction(board, col, self.player, depth, index)
+                self._make_move(board, col, self.player)
+                extension = self._extension(board, depth)
+                if reduction and not extension:
+                    self.reductions += 1
+                    eval_score = self._minimax(board, depth - 1 - reduction, alpha, beta, False)
+                    if eval_score > alpha:
+                        self.reduction_researches += 1
+                        eval_score = self._minimax(board, depth - 1, alpha, beta, False)
+                else:
+                    eval_score = self._minimax(board, depth - 1 + extension, alpha, beta, False)
+                self._unmake_move(board)
+                if eval_score > max_eval:
+                    max_eval = eval_score
+                    best_col = col
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
+                    self.move_orderer.record_cutoff(col, ply, player, depth)
                     break
             
             if max_eval <= original_alpha:
@@ -305,31 +529,213 @@ class AI:
                 flag = self.LOWER_BOUND
             else:
                 flag = self.EXACT
-            self.transposition_table[board_hash] = (max_eval, depth, flag)
+            self.transposition_table.store(board_hash, max_eval, depth, flag, self._orient_move(board, best_col))
             
             return max_eval
         else:
             min_eval = float('inf')
-            for col in ordered_moves:
-                new_board = board.copy()
-                new_board.drop_piece(col, self.opponent)
-                eval_score = self._minimax(new_board, depth - 1, alpha, beta, True)
-                min_eval = min(min_eval, eval_score)
+            best_col = -1
+            for index, col in enumerate(ordered_moves):
+                reduction = self._late_move_reduction(board, col, self.opponent, depth, index)
+                self._make_move(board, col, self.opponent)
+                extension = self._extension(board, depth)
+                if reduction and not extension:
+                    self.reductions += 1
+                    eval_score = self._minimax(board, depth - 1 - reduction, alpha, beta, True)
+                    if eval_score < beta:
+                        self.reduction_researches += 1
+                        eval_score = self._minimax(board, depth - 1, alpha, beta, True)
+                else:
+                    eval_score = self._minimax(board, depth - 1 + extension, alpha, beta, True)
+                self._unmake_move(board)
+                if eval_score < min_eval:
+                    min_eval = eval_score
+                    best_col = col
                 beta = min(beta, eval_score)
                 if beta <= alpha:
+                    self.move_orderer.record_cutoff(col, ply, player, depth)
                     break
             
-            if min_eval >= beta:
-                flag = self.LOWER_BOUND
-            elif min_eval <= original_alpha:
+            if min_eval <= original_alpha:
                 flag = self.UPPER_BOUND
+            elif min_eval >= original_beta:
+                flag = self.LOWER_BOUND
             else:
                 flag = self.EXACT
-            self.transposition_table[board_hash] = (min_eval, depth, flag)
+            self.transposition_table.store(board_hash, min_eval, depth, flag, self._orient_move(board, best_col))
             
             return min_eval
 
-    def _evaluate_board(self, board: Board) -> float:
+    def _pvs(self, board: Board, depth: int, alpha: float, beta: float, color: int) -> float:
+        # Negamax: scores are from the side to move's view (color 1 for this
+        # AI, -1 for the opponent). Table entries stay in the AI's view so
+        # both engines can share one table.
+        self.nodes += 1
+        if self.nodes % self.TIME_CHECK_INTERVAL == 0 and self._search_interrupted():
+            raise SearchAborted()
+        
+        board_hash = self._board_hash(board)
+        
+        entry = self.transposition_table.probe(board_hash)
+        tt_move = -1
+        if entry is not None:
+            stored_score, stored_depth, flag, tt_move = entry
+            tt_move = self._orient_move(board, tt_move)
+            if stored_depth >= depth:
+                stored_score *= color
+                if color < 0 and flag != self.EXACT:
+                    flag = self.LOWER_BOUND if flag == self.UPPER_BOUND else self.UPPER_BOUND
+                if flag == self.EXACT:
+                    return stored_score
+                elif flag == self.LOWER_BOUND:
+                    alpha = max(alpha, stored_score)
+                elif flag == self.UPPER_BOUND:
+                    beta = min(beta, stored_score)
+                if alpha >= beta:
+                    return stored_score
+        
+        winner = board.check_last_move_winner()
+        if winner == self.player:
+            return color * (self.WIN_SCORE + depth)
+        if winner == self.opponent:
+            return -color * (self.WIN_SCORE + depth)
+        if board.is_full() or depth == 0:
+            return color * self._cached_evaluation(board, board_hash)
+        
+        ply = board.move_count
+        player = self.player if color > 0 else self.opponent
+        ordered_moves = self.move_orderer.order(board, board.get_valid_moves(), player, tt_move)
+        
+        if depth == 1 and self.batch_evaluator is not None:
+            if color > 0:
+                return self._minimax_frontier(board, board_hash, ordered_moves, alpha, beta, True)
+            return -self._minimax_frontier(board, board_hash, ordered_moves, -beta, -alpha, False)
+        
+        original_alpha = alpha
+        best_score = float('-inf')
+        best_col = -1
+        for index, col in enumerate(ordered_moves):
+            reduction = self._late_move_reduction(board, col, player, depth, index)
+            self._make_move(board, col, player)
+            child_depth = depth - 1 + self._extension(board, depth)
+            if index == 0:
+                score = -self._pvs(board, child_depth, -beta, -alpha, -color)
+            else:
+                if reduction and child_depth < depth:
+                    self.reductions += 1
+                    score = -self._pvs(board, child_depth - reduction, -alpha - 1, -alpha, -color)
+                    if score > alpha:
+                        self.reduction_researches += 1
+                        score = -self._pvs(board, child_depth, -alpha - 1, -alpha, -color)
+                else:
+                    score = -self._pvs(board, child_depth, -alpha - 1, -alpha, -color)
+                if alpha < score < beta:
+                    self.researches += 1
+                    score = -self._pvs(board, child_depth, -beta, -alpha, -color)
+            self._unmake_move(board)
+            if score > best_score:
+                best_score = score
+                best_col = col
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.move_orderer.record_cutoff(col, ply, player, depth)
+                break
+        
+        if best_score <= original_alpha:
+            flag = self.UPPER_BOUND if color > 0 else self.LOWER_BOUND
+        elif best_score >= beta:
+            flag = self.LOWER_BOUND if color > 0 else self.UPPER_BOUND
+        else:
+            flag = self.EXACT
+        self.transposition_table.store(board_hash, color * best_score, depth, flag, self._orient_move(board, best_col))
+        
+        return best_score
+
+    def _late_move_reduction(self, board: Board, col: int, player: int, depth: int, index: int) -> int:
+        if self.lmr_reduction <= 0 or index < self.lmr_min_moves or depth < self.lmr_min_depth:
+            return 0
+        opponent = Board.PLAYER1 if player == Board.PLAYER2 else Board.PLAYER2
+        if board.is_winning_move(col, player) or board.is_winning_move(col, opponent):
+            return 0
+        return min(self.lmr_reduction, depth - 1)
+
+    def _extension(self, board: Board, depth: int) -> int:
+        # Called after a move: extend when the side now to move has exactly
+        # one reply that does not lose at once, up to the search horizon.
+        if self.extension_limit <= 0 or board.move_count + depth > self._horizon:
+            return 0
+        to_move = Board.PLAYER1 if board.move_count % 2 == 0 else Board.PLAYER2
+        replies = Board.non_losing_moves(board.masks[to_move], board.masks[Board.PLAYER1] | board.masks[Board.PLAYER2])
+        if replies == 0 or replies & (replies - 1):
+            return 0
+        self.extensions += 1
+        return 1
+
+    def _minimax_frontier(self, board: Board, board_hash: int, ordered_moves: List[int], alpha: float,
+                          beta: float, is_maximizing: bool) -> float:
+        player = self.player if is_maximizing else self.opponent
+        scores: Dict[int, float] = {}
+        pending: List[int] = []
+        grids = []
+        for col in ordered_moves:
+            self._make_move(board, col, player)
+            if self._extension(board, 1):
+                scores[col] = self._extended_child(board, alpha, beta, not is_maximizing)
+                self._unmake_move(board)
+                continue
+            self.nodes += 1
+            winner = board.check_last_move_winner()
+            if winner == self.player:
+                scores[col] = self.WIN_SCORE
+            elif winner == self.opponent:
+                scores[col] = -self.WIN_SCORE
+            else:
+                pending.append(col)
+                grids.append([row[:] for row in board.grid])
+            self._unmake_move(board)
+        if grids:
+            scores.update(zip(pending, self.batch_evaluator.evaluate_grids(grids)))
+        
+        best_col = ordered_moves[0]
+        for col in ordered_moves:
+            if (scores[col] > scores[best_col]) if is_maximizing else (scores[col] < scores[best_col]):
+                best_col = col
+        best_score = scores[best_col]
+        
+        if best_score >= beta if is_maximizing else best_score <= alpha:
+            self.move_orderer.record_cutoff(best_col, board.move_count, player, 1)
+        if best_score <= alpha:
+            flag = self.UPPER_BOUND
+        elif best_score >= beta:
+            flag = self.LOWER_BOUND
+        else:
+            flag = self.EXACT
+        self.transposition_table.store(board_hash, best_score, 1, flag, self._orient_move(board, best_col))
+        
+        return best_score
+
+    def _extended_child(self, board: Board, alpha: float, beta: float, is_maximizing: bool) -> float:
+        # A forced reply at the last ply is searched one ply deeper by the
+        # scalar engine, as it would be without batching.
+        if self.search == 'minimax':
+            return self._minimax(board, 1, alpha, beta, is_maximizing)
+        if is_maximizing:
+            return self._pvs(board, 1, alpha, beta, 1)
+        return -self._pvs(board, 1, -beta, -alpha, -1)
+
+    def _cached_evaluation(self, board: Board, board_hash: int) -> float:
+        # Search leaves only: the incremental evaluator is in step with the
+        # board here because every search move goes through _make_move.
+        line_score = self.evaluator.score if self.line_evaluator == 'incremental' else None
+        if self.eval_cache is None:
+            return self._evaluate_board(board, line_score)
+        score = self.eval_cache.get(board_hash)
+        if score is None:
+            score = self._evaluate_board(board, line_score)
+            self.eval_cache.put(board_hash, score)
+        return score
+
+    def _evaluate_board(self, board: Board, line_score: Optional[float] = None) -> float:
         score = 0.0
         
         center_col = Board.COLS // 2
@@ -340,11 +746,18 @@ class AI:
             adj_count = sum(1 for row in range(Board.ROWS) if board.grid[row][col] == self.player)
             score += adj_count * 3
         
-        score += self._evaluate_lines(board)
+        if line_score is not None:
+            score += line_score
+        elif self.line_evaluator == 'windows':
+            score += self._evaluate_lines(board)
+        else:
+            score += self.pattern_evaluator.evaluate(board)
         
-        score += self._evaluate_threats(board)
+        analysis = ThreatAnalysis(board)
         
-        score += self._detect_zugzwang(board)
+        score += self._evaluate_threats(board, analysis)
+        
+        score += self._detect_zugzwang(board, analysis)
         
         return score
 
@@ -394,3 +807,40 @@ class AI:
             score -= 8
         
         return score
+
+
+_worker_ai: Optional[AI] = None
+_worker_alpha = None
+
+
+def _init_search_worker(player: int, options: Dict, shared_alpha, abort_event, table_name: Optional[str]):
+    global _worker_ai, _worker_alpha
+    table = SharedTranspositionTable(name=table_name) if table_name is not None else None
+    _worker_ai = AI(player, transposition_table=table, **options)
+    _worker_ai._stop_event = abort_event
+    _worker_alpha = shared_alpha
+
+
+def _search_root_move(history: List[int], col: int, depth: int,
+                      deadline: Optional[float]) -> Tuple[int, Optional[float], Dict[str, int]]:
+    board = Board()
+    for ply, move in enumerate(history):
+        board.drop_piece(move, Board.PLAYER1 if ply % 2 == 0 else Board.PLAYER2)
+    _worker_ai._reset_counters()
+    _worker_ai.transposition_table.new_search()
+    _worker_ai._deadline = deadline
+    _worker_ai._horizon = len(history) + depth + _worker_ai.extension_limit
+    alpha = _worker_alpha.value - 1
+    _worker_ai.evaluator.reset(board)
+    _worker_ai._make_move(board, col, _worker_ai.player)
+    try:
+        if _worker_ai.search == 'pvs':
+            score = -_worker_ai._pvs(board, depth - 1, float('-inf'), -alpha, -1)
+        else:
+            score = _worker_ai._minimax(board, depth - 1, alpha, float('inf'), False)
+    except SearchAborted:
+        return col, None, _worker_ai._counters()
+    with _worker_alpha.get_lock():
+        if score > _worker_alpha.value:
+            _worker_alpha.value = score
+    return col, score, _worker_ai._counters()
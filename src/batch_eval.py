@@ -0,0 +1,89 @@
+from typing import List, Sequence, Tuple
+import numpy as np
+from board import Board
+from evaluation import IncrementalEvaluator
+
+
+def _cell(row: int, col: int) -> int:
+    return row * Board.COLS + col
+
+
+class BatchEvaluator:
+    # Positions are (N, ROWS, COLS) int8 grids in Board.grid layout, flattened
+    # to (N, 42) so every term below is a fancy-index or a matrix product.
+    CELLS = Board.ROWS * Board.COLS
+    WINDOW_CELLS = np.array([[_cell(row, col) for row, col in window] for window in IncrementalEvaluator.WINDOWS])
+    CELL_HEIGHTS = np.array([Board.ROWS - 1 - cell // Board.COLS for cell in range(CELLS)])
+    CELL_COLS = np.array([cell % Board.COLS for cell in range(CELLS)])
+    MAX_DISTANCE = Board.ROWS - 1
+
+    def __init__(self, player: int):
+        self.player = player
+        self.opponent = Board.PLAYER1 if player == Board.PLAYER2 else Board.PLAYER2
+        self.window_scores = np.array(IncrementalEvaluator(player).window_scores, dtype=np.float64)
+        self.position_weights = np.zeros(self.CELLS)
+        self.position_weights[self.CELL_COLS == Board.COLS // 2] = 6
+        self.position_weights[(self.CELL_COLS == 2) | (self.CELL_COLS == 4)] = 3
+
+        incidence = np.zeros((self.WINDOW_CELLS.size, self.CELLS))
+        incidence[np.arange(self.WINDOW_CELLS.size), self.WINDOW_CELLS.ravel()] = 1
+        self.incidence = incidence
+
+        self.my_weights = self._threat_weights(player, 200, (60, 8, 10), (30, 5, 5))
+        self.opp_weights = self._threat_weights(self.opponent, 180, (55, 8, 8), (25, 5, 3))
+
+    def _threat_weights(self, player: int, playable_score: int, favorable: Tuple[int, int, int],
+                        unfavorable: Tuple[int, int, int]) -> np.ndarray:
+        favorable_parity = 1 if player == Board.PLAYER1 else 0
+        weights = np.zeros((self.CELLS, self.MAX_DISTANCE + 1))
+        for cell in range(self.CELLS):
+            base, step, floor = favorable if self.CELL_HEIGHTS[cell] % 2 == favorable_parity else unfavorable
+            weights[cell, 0] = playable_score
+            for distance in range(1, self.MAX_DISTANCE + 1):
+                weights[cell, distance] = max(base - distance * step, floor)
+        return weights
+
+    @staticmethod
+    def stack(grids: Sequence[List[List[int]]]) -> np.ndarray:
+        return np.array(grids, dtype=np.int8).reshape(-1, Board.ROWS, Board.COLS)
+
+    def evaluate_grids(self, grids: Sequence[List[List[int]]]) -> List[float]:
+        return self.evaluate(self.stack(grids)).tolist()
+
+    def evaluate_boards(self, boards: Sequence[Board]) -> List[float]:
+        return self.evaluate_grids([board.grid for board in boards])
+
+    def evaluate(self, grids: np.ndarray) -> np.ndarray:
+        flat = grids.reshape(-1, self.CELLS)
+        count = flat.shape[0]
+        mine = flat == self.player
+
+        score = mine @ self.position_weights
+
+        windows = flat[:, self.WINDOW_CELLS]
+        window_mine = (windows == self.player).sum(axis=2)
+        window_theirs = (windows == self.opponent).sum(axis=2)
+        score += self.window_scores[window_mine * IncrementalEvaluator.PLAYER_STEP + window_theirs].sum(axis=1)
+
+        heights = (grids.reshape(-1, Board.ROWS, Board.COLS) != Board.EMPTY).sum(axis=1)
+        playable = heights[:, self.CELL_COLS]
+        distance = np.clip(self.CELL_HEIGHTS - playable, 0, self.MAX_DISTANCE)
+        cells = np.arange(self.CELLS)
+        gaps = windows == Board.EMPTY
+
+        my_windows = (window_mine == 3) & (window_theirs == 0)
+        my_counts = (gaps & my_windows[:, :, None]).reshape(count, -1) @ self.incidence
+        score += (my_counts * self.my_weights[cells, distance]).sum(axis=1)
+
+        opp_windows = (window_theirs == 3) & (window_mine == 0)
+        opp_counts = (gaps & opp_windows[:, :, None]).reshape(count, -1) @ self.incidence
+        score -= (opp_counts * self.opp_weights[cells, distance]).sum(axis=1)
+
+        my_threats = (my_counts > 0).reshape(-1, Board.ROWS, Board.COLS)
+        score += 150 * (my_threats[:, :-1, :] & my_threats[:, 1:, :]).sum(axis=(1, 2))
+
+        above_playable = self.CELL_HEIGHTS == playable + 1
+        score -= 100 * ((opp_counts > 0) & above_playable).sum(axis=1)
+        score += 90 * ((my_counts > 0) & above_playable).sum(axis=1)
+
+        return score
@@ -1,6 +1,12 @@
+import random
 from typing import Optional, List
 
 
+def _make_zobrist_keys(seed: int, cells: int) -> List[List[int]]:
+    rng = random.Random(seed)
+    return [[0] * cells] + [[rng.getrandbits(64) for _ in range(cells)] for _ in range(2)]
+
+
 class Board:
     ROWS = 6
     COLS = 7
@@ -8,70 +14,171 @@ class Board:
     PLAYER1 = 1
     PLAYER2 = 2
 
+    # Bitboard layout: each column uses ROWS + 1 bits, bottom cell first, with a
+    # spare sentinel bit on top so shifted lines never wrap into the next column.
+    COL_BITS = ROWS + 1
+    BOTTOM_MASK = sum(1 << shift for shift in range(0, COLS * COL_BITS, COL_BITS))
+    BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+    DIRECTIONS = (1, COL_BITS, COL_BITS - 1, COL_BITS + 1)
+    ZOBRIST_SEED = 20251201
+    ZOBRIST_KEYS = _make_zobrist_keys(ZOBRIST_SEED, COLS * COL_BITS)
+
     def __init__(self):
         self.grid: List[List[int]] = [[self.EMPTY for _ in range(self.COLS)] for _ in range(self.ROWS)]
         self.last_move: Optional[int] = None
+        self.masks: List[int] = [0, 0, 0]
+        self.heights: List[int] = [0] * self.COLS
+        self.move_count = 0
+        self.move_history: List[int] = []
+        self.hash_key = 0
+        self.mirror_key = 0
 
     def copy(self) -> 'Board':
         new_board = Board()
         new_board.grid = [row[:] for row in self.grid]
         new_board.last_move = self.last_move
+        new_board.masks = self.masks[:]
+        new_board.heights = self.heights[:]
+        new_board.move_count = self.move_count
+        new_board.move_history = self.move_history[:]
+        new_board.hash_key = self.hash_key
+        new_board.mirror_key = self.mirror_key
         return new_board
 
+    @staticmethod
+    def has_four(mask: int) -> bool:
+        for shift in Board.DIRECTIONS:
+            pairs = mask & (mask >> shift)
+            if pairs & (pairs >> (2 * shift)):
+                return True
+        return False
+
+    @staticmethod
+    def winning_cells(position: int, mask: int) -> int:
+        cells = (position << 1) & (position << 2) & (position << 3)
+        for shift in Board.DIRECTIONS[1:]:
+            pairs = (position << shift) & (position << (2 * shift))
+            cells |= pairs & (position << (3 * shift))
+            cells |= pairs & (position >> shift)
+            pairs = (position >> shift) & (position >> (2 * shift))
+            cells |= pairs & (position << shift)
+            cells |= pairs & (position >> (3 * shift))
+        return cells & (Board.BOARD_MASK ^ mask)
+
+    @staticmethod
+    def non_losing_moves(position: int, mask: int) -> int:
+        possible = (mask + Board.BOTTOM_MASK) & Board.BOARD_MASK
+        opponent_wins = Board.winning_cells(position ^ mask, mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                return 0
+            possible = forced
+        return possible & ~(opponent_wins >> 1)
+
+    @staticmethod
+    def threat_masks(position: int, mask: int) -> List[int]:
+        # One mask per direction and gap position, so a cell that completes
+        # several lines is counted once per line.
+        empty = Board.BOARD_MASK ^ mask
+        threats = []
+        for shift in Board.DIRECTIONS:
+            ahead1 = position >> shift
+            ahead2 = position >> (2 * shift)
+            ahead3 = position >> (3 * shift)
+            behind1 = position << shift
+            behind2 = position << (2 * shift)
+            behind3 = position << (3 * shift)
+            threats.append(empty & ahead1 & ahead2 & ahead3)
+            threats.append(empty & behind1 & ahead1 & ahead2)
+            threats.append(empty & behind2 & behind1 & ahead1)
+            threats.append(empty & behind3 & behind2 & behind1)
+        return threats
+
     def drop_piece(self, col: int, player: int) -> bool:
         if col < 0 or col >= self.COLS:
             return False
-        if self.grid[0][col] != self.EMPTY:
+        height = self.heights[col]
+        if height >= self.ROWS:
             return False
-        for row in range(self.ROWS - 1, -1, -1):
-            if self.grid[row][col] == self.EMPTY:
-                self.grid[row][col] = player
-                self.last_move = col
-                return True
-        return False
+        bit = col * self.COL_BITS + height
+        self.grid[self.ROWS - 1 - height][col] = player
+        self.masks[player] |= 1 << bit
+        self.hash_key ^= self.ZOBRIST_KEYS[player][bit]
+        self.mirror_key ^= self.ZOBRIST_KEYS[player][(self.COLS - 1 - col) * self.COL_BITS + height]
+        self.heights[col] = height + 1
+        self.move_count += 1
+        self.move_history.append(col)
+        self.last_move = col
+        return True
+
+    def undo_move(self) -> int:
+        if not self.move_history:
+            return -1
+        col = self.move_history.pop()
+        height = self.heights[col] - 1
+        row = self.ROWS - 1 - height
+        player = self.grid[row][col]
+        bit = col * self.COL_BITS + height
+        self.grid[row][col] = self.EMPTY
+        self.masks[player] ^= 1 << bit
+        self.hash_key ^= self.ZOBRIST_KEYS[player][bit]
+        self.mirror_key ^= self.ZOBRIST_KEYS[player][(self.COLS - 1 - col) * self.COL_BITS + height]
+        self.heights[col] = height
+        self.move_count -= 1
+        self.last_move = self.move_history[-1] if self.move_history else None
+        return col
+
+    def canonical_key(self) -> int:
+        return min(self.hash_key, self.mirror_key)
+
+    def is_symmetric(self) -> bool:
+        return self.hash_key == self.mirror_key
 
     def is_valid_move(self, col: int) -> bool:
-        return 0 <= col < self.COLS and self.grid[0][col] == self.EMPTY
+        return 0 <= col < self.COLS and self.heights[col] < self.ROWS
 
     def get_valid_moves(self) -> List[int]:
-        return [col for col in range(self.COLS) if self.is_valid_move(col)]
+        return [col for col in range(self.COLS) if self.heights[col] < self.ROWS]
 
     def is_full(self) -> bool:
-        return all(self.grid[0][col] != self.EMPTY for col in range(self.COLS))
+        return self.move_count == self.ROWS * self.COLS
 
     def check_winner(self) -> int:
-        for row in range(self.ROWS):
-            for col in range(self.COLS - 3):
-                if self.grid[row][col] != self.EMPTY:
-                    if (self.grid[row][col] == self.grid[row][col + 1] ==
-                        self.grid[row][col + 2] == self.grid[row][col + 3]):
-                        return self.grid[row][col]
-
-        for row in range(self.ROWS - 3):
-            for col in range(self.COLS):
-                if self.grid[row][col] != self.EMPTY:
-                    if (self.grid[row][col] == self.grid[row + 1][col] ==
-                        self.grid[row + 2][col] == self.grid[row + 3][col]):
-                        return self.grid[row][col]
-
-        for row in range(self.ROWS - 3):
-            for col in range(self.COLS - 3):
-                if self.grid[row][col] != self.EMPTY:
-                    if (self.grid[row][col] == self.grid[row + 1][col + 1] ==
-                        self.grid[row + 2][col + 2] == self.grid[row + 3][col + 3]):
-                        return self.grid[row][col]
-
-        for row in range(3, self.ROWS):
-            for col in range(self.COLS - 3):
-                if self.grid[row][col] != self.EMPTY:
-                    if (self.grid[row][col] == self.grid[row - 1][col + 1] ==
-                        self.grid[row - 2][col + 2] == self.grid[row - 3][col + 3]):
-                        return self.grid[row][col]
+        if self.has_four(self.masks[self.PLAYER1]):
+            return self.PLAYER1
+        if self.has_four(self.masks[self.PLAYER2]):
+            return self.PLAYER2
+        return self.EMPTY
 
+    def is_winning_move(self, col: int, player: int) -> bool:
+        bit = 1 << (col * self.COL_BITS + self.heights[col])
+        return self.has_four(self.masks[player] | bit)
+
+    def check_last_move_winner(self) -> int:
+        if self.last_move is None:
+            return self.EMPTY
+        col = self.last_move
+        height = self.heights[col] - 1
+        player = self.grid[self.ROWS - 1 - height][col]
+        mask = self.masks[player]
+        bit = col * self.COL_BITS + height
+        for shift in self.DIRECTIONS:
+            count = 1
+            pos = bit - shift
+            while pos >= 0 and (mask >> pos) & 1:
+                count += 1
+                pos -= shift
+            pos = bit + shift
+            while (mask >> pos) & 1:
+                count += 1
+                pos += shift
+            if count >= 4:
+                return player
         return self.EMPTY
 
+    def get_height(self, col: int) -> int:
+        return self.heights[col]
+
     def get_row_for_column(self, col: int) -> int:
-        for row in range(self.ROWS - 1, -1, -1):
-            if self.grid[row][col] == self.EMPTY:
-                return row
-        return -1
+        return self.ROWS - 1 - self.heights[col]
@@ -0,0 +1,54 @@
+import mmap
+import struct
+from typing import Dict
+from board import Board
+
+
+class OpeningBook:
+    MAGIC = b'C4BK'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHI')
+    ENTRY = struct.Struct('<QB')
+    KEY = struct.Struct('<Q')
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_plies, self.count = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {self.VERSION} opening book")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup(self, board: Board) -> int:
+        if board.move_count > self.max_plies:
+            return -1
+        key = board.canonical_key()
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            offset = self.HEADER.size + mid * self.ENTRY.size
+            mid_key = self.KEY.unpack_from(self._map, offset)[0]
+            if mid_key < key:
+                low = mid + 1
+            elif mid_key > key:
+                high = mid
+            else:
+                col = self._map[offset + self.KEY.size]
+                if board.mirror_key < board.hash_key:
+                    col = Board.COLS - 1 - col
+                return col
+        return -1
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @classmethod
+    def write(cls, path: str, entries: Dict[int, int], max_plies: int):
+        with open(path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, max_plies, len(entries)))
+            for key in sorted(entries):
+                f.write(cls.ENTRY.pack(key, entries[key]))
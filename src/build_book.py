@@ -0,0 +1,48 @@
+import sys
+from typing import Dict
+from board import Board
+from ai import AI
+from book import OpeningBook
+
+
+def generate_book(path: str, max_plies: int, depth: int):
+    ais = {player: AI(player, depth=depth, solver_threshold=0) for player in (Board.PLAYER1, Board.PLAYER2)}
+    entries: Dict[int, int] = {}
+    board = Board()
+
+    def visit():
+        key = board.canonical_key()
+        if key in entries:
+            return
+        player = Board.PLAYER1 if board.move_count % 2 == 0 else Board.PLAYER2
+        col = ais[player].get_move(board)
+        entries[key] = Board.COLS - 1 - col if board.mirror_key < board.hash_key else col
+        print(f"  {len(entries):6d} positions", end="\r")
+        sys.stdout.flush()
+        if board.move_count >= max_plies:
+            return
+        for move in board.get_valid_moves():
+            board.drop_piece(move, player)
+            if board.check_last_move_winner() == Board.EMPTY:
+                visit()
+            board.undo_move()
+
+    visit()
+    print()
+    OpeningBook.write(path, entries, max_plies)
+    return len(entries)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python build_book.py OUTPUT [PLIES] [DEPTH]")
+        return
+    path = sys.argv[1]
+    max_plies = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else AI.MAX_DEPTH
+    count = generate_book(path, max_plies, depth)
+    print(f"  Wrote {count} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
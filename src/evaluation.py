@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from board import Board
+
+
+def _make_windows() -> List[Tuple[Tuple[int, int], ...]]:
+    windows = []
+    for row in range(Board.ROWS):
+        for col in range(Board.COLS - 3):
+            windows.append(tuple((row, col + i) for i in range(4)))
+    for row in range(Board.ROWS - 3):
+        for col in range(Board.COLS):
+            windows.append(tuple((row + i, col) for i in range(4)))
+    for row in range(Board.ROWS - 3):
+        for col in range(Board.COLS - 3):
+            windows.append(tuple((row + i, col + i) for i in range(4)))
+    for row in range(3, Board.ROWS):
+        for col in range(Board.COLS - 3):
+            windows.append(tuple((row - i, col + i) for i in range(4)))
+    return windows
+
+
+def _window_score(player_count: int, opponent_count: int) -> int:
+    score = 0
+    empty_count = 4 - player_count - opponent_count
+    if empty_count < 0:
+        return 0
+
+    if player_count == 4:
+        score += 1000
+    elif player_count == 3 and empty_count == 1:
+        score += 50
+    elif player_count == 2 and empty_count == 2:
+        score += 10
+
+    if opponent_count == 4:
+        score -= 1000
+    elif opponent_count == 3 and empty_count == 1:
+        score -= 80
+    elif opponent_count == 2 and empty_count == 2:
+        score -= 8
+
+    return score
+
+
+def _make_cell_windows(windows: List[Tuple[Tuple[int, int], ...]]) -> List[List[int]]:
+    cell_windows: List[List[int]] = [[] for _ in range(Board.ROWS * Board.COLS)]
+    for index, window in enumerate(windows):
+        for row, col in window:
+            cell_windows[row * Board.COLS + col].append(index)
+    return cell_windows
+
+
+class IncrementalEvaluator:
+    # Each window is stored as a code of player_count * 5 + opponent_count, so a
+    # drop or undo only moves the code of the windows through that one cell.
+    WINDOWS = _make_windows()
+    CELL_WINDOWS = _make_cell_windows(WINDOWS)
+    PLAYER_STEP = 5
+    OPPONENT_STEP = 1
+
+    def __init__(self, player: int):
+        self.player = player
+        self.opponent = Board.PLAYER1 if player == Board.PLAYER2 else Board.PLAYER2
+        self.window_scores = [_window_score(code // self.PLAYER_STEP, code % self.PLAYER_STEP)
+                              for code in range(self.PLAYER_STEP * self.PLAYER_STEP)]
+        self.codes = [0] * len(self.WINDOWS)
+        self.score = 0
+
+    def reset(self, board: Board):
+        self.codes = [0] * len(self.WINDOWS)
+        for index, window in enumerate(self.WINDOWS):
+            for row, col in window:
+                if board.grid[row][col] == self.player:
+                    self.codes[index] += self.PLAYER_STEP
+                elif board.grid[row][col] == self.opponent:
+                    self.codes[index] += self.OPPONENT_STEP
+        self.score = sum(self.window_scores[code] for code in self.codes)
+
+    def add(self, row: int, col: int, player: int):
+        step = self.PLAYER_STEP if player == self.player else self.OPPONENT_STEP
+        codes = self.codes
+        window_scores = self.window_scores
+        for index in self.CELL_WINDOWS[row * Board.COLS + col]:
+            code = codes[index]
+            codes[index] = code + step
+            self.score += window_scores[code + step] - window_scores[code]
+
+    def remove(self, row: int, col: int, player: int):
+        step = self.PLAYER_STEP if player == self.player else self.OPPONENT_STEP
+        codes = self.codes
+        window_scores = self.window_scores
+        for index in self.CELL_WINDOWS[row * Board.COLS + col]:
+            code = codes[index]
+            codes[index] = code - step
+            self.score += window_scores[code - step] - window_scores[code]
+
+
+def _make_lines() -> List[Tuple[Tuple[int, int], ...]]:
+    lines = [tuple((row, col) for col in range(Board.COLS)) for row in range(Board.ROWS)]
+    lines += [tuple((row, col) for row in range(Board.ROWS)) for col in range(Board.COLS)]
+    for start in range(-(Board.ROWS - 4), Board.COLS - 3):
+        cells = tuple((row, row + start) for row in range(Board.ROWS) if 0 <= row + start < Board.COLS)
+        lines.append(cells)
+    for start in range(3, Board.ROWS + Board.COLS - 4):
+        cells = tuple((row, start - row) for row in range(Board.ROWS - 1, -1, -1) if 0 <= start - row < Board.COLS)
+        lines.append(cells)
+    return lines
+
+
+def _make_line_table(player: int, length: int) -> List[int]:
+    opponent = Board.PLAYER1 if player == Board.PLAYER2 else Board.PLAYER2
+    table = []
+    for code in range(3 ** length):
+        digits = []
+        for _ in range(length):
+            digits.append(code % 3)
+            code //= 3
+        score = 0
+        for start in range(length - 3):
+            window = digits[start:start + 4]
+            score += _window_score(window.count(player), window.count(opponent))
+        table.append(score)
+    return table
+
+
+def _make_line_tables(lines: List[Tuple[Tuple[int, int], ...]]) -> Dict[int, Dict[int, List[int]]]:
+    lengths = sorted(set(len(line) for line in lines))
+    return {player: {length: _make_line_table(player, length) for length in lengths}
+            for player in (Board.PLAYER1, Board.PLAYER2)}
+
+
+class PatternEvaluator:
+    # A line of n cells is read as an n-digit base-3 number (the grid already
+    # stores 0, 1 and 2); the table for that length holds the summed score of
+    # every window along it, so a leaf costs one lookup per line.
+    LINES = _make_lines()
+    LINE_TABLES = _make_line_tables(LINES)
+
+    def __init__(self, player: int):
+        self.player = player
+        tables = self.LINE_TABLES[player]
+        self.lines = [(line, tables[len(line)]) for line in self.LINES]
+
+    def evaluate(self, board: Board) -> int:
+        grid = board.grid
+        score = 0
+        for line, table in self.lines:
+            code = 0
+            for row, col in line:
+                code = code * 3 + grid[row][col]
+            score += table[code]
+        return score
+
+
+class ThreatAnalysis:
+    # Threat cells for both players as bitmasks, kept per direction and gap
+    # position so a cell completing several windows still counts once per
+    # window. Layer d holds the empty cells d rows above each playable cell.
+    ODD_HEIGHTS = sum(Board.BOTTOM_MASK << height for height in range(1, Board.ROWS, 2))
+    EVEN_HEIGHTS = sum(Board.BOTTOM_MASK << height for height in range(0, Board.ROWS, 2))
+
+    def __init__(self, board: Board):
+        occupied = board.masks[Board.PLAYER1] | board.masks[Board.PLAYER2]
+        empty = Board.BOARD_MASK ^ occupied
+        layer = (occupied + Board.BOTTOM_MASK) & Board.BOARD_MASK
+        self.layers = [layer]
+        for _ in range(Board.ROWS - 1):
+            layer = (layer << 1) & empty
+            self.layers.append(layer)
+        self.above_playable = self.layers[1]
+        self.threats: List[List[int]] = [[], [], []]
+        self.masks = [0, 0, 0]
+        for player in (Board.PLAYER1, Board.PLAYER2):
+            for threats in Board.threat_masks(board.masks[player], occupied):
+                if threats:
+                    self.threats[player].append(threats)
+                    self.masks[player] |= threats
+
+
+class EvaluationCache:
+    DEFAULT_ENTRIES = 1 << 16
+
+    def __init__(self, max_entries: int = DEFAULT_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self.entries: 'OrderedDict[int, float]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: int) -> Optional[float]:
+        score = self.entries.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return score
+
+    def put(self, key: int, score: float):
+        self.entries[key] = score
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,14 +1,16 @@
 from board import Board
 from display import Display
 from ai import AI
+from ponder import Ponderer
 
 
 class Game:
-    def __init__(self, vs_computer: bool = False):
+    def __init__(self, vs_computer: bool = False, ponder: bool = False):
         self.board = Board()
         self.current_player = Board.PLAYER1
         self.vs_computer = vs_computer
         self.ai = AI(Board.PLAYER2) if vs_computer else None
+        self.ponderer = Ponderer(self.ai) if self.ai and ponder else None
         self.game_over = False
         self.winner = Board.EMPTY
         self.last_computer_move = -1
@@ -18,7 +20,7 @@ class Game:
 
     def make_move(self, col: int) -> bool:
         if self.board.drop_piece(col, self.current_player):
-            winner = self.board.check_winner()
+            winner = self.board.check_last_move_winner()
             if winner != Board.EMPTY:
                 self.game_over = True
                 self.winner = winner
@@ -31,7 +33,12 @@ class Game:
 
     def computer_move(self) -> int:
         if self.ai and self.current_player == Board.PLAYER2:
-            col = self.ai.get_move(self.board)
+            col = -1
+            if self.ponderer:
+                self.ponderer.stop()
+                col = self.ponderer.get_result(self.board)
+            if col < 0:
+                col = self.ai.get_move(self.board)
             self.make_move(col)
             return col
         return -1
@@ -49,9 +56,13 @@ class Game:
                 if self.last_computer_move >= 0:
                     Display.print_computer_move(self.last_computer_move)
                     self.last_computer_move = -1
+                if self.ponderer:
+                    self.ponderer.start(self.board)
                 move_input = Display.get_move_input()
                 
                 if move_input == 'q':
+                    if self.ponderer:
+                        self.ponderer.stop()
                     return False
                 
                 try:
@@ -63,6 +74,8 @@ class Game:
                     Display.print_invalid_move()
                     input("  Press Enter to continue...")
         
+        if self.ponderer:
+            self.ponderer.stop()
         Display.render_board(self.board)
         
         if self.winner != Board.EMPTY:
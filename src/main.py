@@ -15,7 +15,7 @@ def main():
             if not game.play():
                 continue
         elif choice == '2':
-            game = Game(vs_computer=True)
+            game = Game(vs_computer=True, ponder=True)
             if not game.play():
                 continue
         else:
@@ -0,0 +1,54 @@
+from typing import List
+from board import Board
+
+
+class MoveOrderer:
+    MAX_PLY = Board.ROWS * Board.COLS
+    CENTER_SCORES = [0, 2, 5, 10, 5, 2, 0]
+    WIN = 5
+    BLOCK = 4
+    TT_MOVE = 3
+    FIRST_KILLER = 2
+    SECOND_KILLER = 1
+
+    def __init__(self):
+        self.killers: List[List[int]] = [[-1, -1] for _ in range(self.MAX_PLY + 1)]
+        self.history: List[List[int]] = [[0] * Board.COLS for _ in range(3)]
+
+    def order(self, board: Board, valid_moves: List[int], player: int, tt_move: int = -1) -> List[int]:
+        first_killer, second_killer = self.killers[board.move_count]
+        history = self.history[player]
+        opponent = Board.PLAYER1 if player == Board.PLAYER2 else Board.PLAYER2
+
+        def priority(col: int):
+            if board.is_winning_move(col, player):
+                rank = self.WIN
+            elif board.is_winning_move(col, opponent):
+                rank = self.BLOCK
+            elif col == tt_move:
+                rank = self.TT_MOVE
+            elif col == first_killer:
+                rank = self.FIRST_KILLER
+            elif col == second_killer:
+                rank = self.SECOND_KILLER
+            else:
+                rank = 0
+            return rank, history[col], self.CENTER_SCORES[col]
+
+        return sorted(valid_moves, key=priority, reverse=True)
+
+    def record_cutoff(self, col: int, ply: int, player: int, depth: int):
+        killers = self.killers[ply]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        self.history[player][col] += depth * depth
+
+    def age(self):
+        for history in self.history:
+            for col in range(Board.COLS):
+                history[col] //= 2
+
+    def clear(self):
+        self.killers = [[-1, -1] for _ in range(self.MAX_PLY + 1)]
+        self.history = [[0] * Board.COLS for _ in range(3)]
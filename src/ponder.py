@@ -0,0 +1,56 @@
+import threading
+from typing import Dict, List, Optional
+from board import Board
+from ai import AI
+from ordering import MoveOrderer
+
+
+class Ponderer:
+    def __init__(self, ai: AI):
+        self.ai = ai
+        self.results: Dict[int, int] = {}
+        self.root_history: List[int] = []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, board: Board):
+        if self._thread is not None and board.move_history == self.root_history:
+            return
+        self.stop()
+        self.results = {}
+        self.root_history = board.move_history[:]
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(board.copy(),), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def get_result(self, board: Board) -> int:
+        if not board.move_history or board.move_history[:-1] != self.root_history:
+            return -1
+        return self.results.get(board.move_history[-1], -1)
+
+    def _predict_replies(self, board: Board) -> List[int]:
+        predicted = [col for col in self.ai.get_principal_variation(board, 1) if board.is_valid_move(col)]
+        others = sorted((col for col in board.get_valid_moves() if col not in predicted),
+                        key=lambda col: MoveOrderer.CENTER_SCORES[col], reverse=True)
+        return predicted + others
+
+    def _run(self, board: Board):
+        self.ai.new_search()
+        for reply in self._predict_replies(board):
+            if self._stop_event.is_set():
+                return
+            board.drop_piece(reply, self.ai.opponent)
+            if board.check_last_move_winner() == Board.EMPTY and not board.is_full():
+                move = self.ai.find_move(board, stop_event=self._stop_event)
+                if not self._stop_event.is_set():
+                    self.results[reply] = move
+            board.undo_move()
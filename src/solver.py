@@ -0,0 +1,129 @@
+from typing import Callable, Dict, List, Optional
+from board import Board
+
+
+class Solver:
+    SIZE = Board.ROWS * Board.COLS
+    MAX_ENTRIES = 1 << 22
+    COLUMN_ORDER = [3, 2, 4, 1, 5, 0, 6]
+    CHECK_INTERVAL = 1024
+
+    def __init__(self):
+        self.table: Dict[int, int] = {}
+        self.nodes = 0
+        self._check: Optional[Callable[[], None]] = None
+
+    @staticmethod
+    def column_mask(col: int) -> int:
+        return ((1 << Board.ROWS) - 1) << (col * Board.COL_BITS)
+
+    @staticmethod
+    def popcount(mask: int) -> int:
+        return bin(mask).count('1')
+
+    def _negamax(self, current: int, mask: int, moves: int, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        if self._check is not None and self.nodes % self.CHECK_INTERVAL == 0:
+            self._check()
+        possible = Board.non_losing_moves(current, mask)
+        if possible == 0:
+            return -((self.SIZE - moves) // 2)
+        if moves >= self.SIZE - 2:
+            return 0
+
+        lower = -((self.SIZE - 2 - moves) // 2)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+
+        upper = (self.SIZE - 1 - moves) // 2
+        key = current + mask
+        stored = self.table.get(key)
+        if stored is not None:
+            upper = stored
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+
+        candidates = []
+        for col in self.COLUMN_ORDER:
+            move = possible & self.column_mask(col)
+            if move:
+                threats = self.popcount(Board.winning_cells(current | move, mask))
+                candidates.append((threats, move))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        for _, move in candidates:
+            score = -self._negamax(current ^ mask, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        if len(self.table) >= self.MAX_ENTRIES:
+            self.table.clear()
+        self.table[key] = alpha
+        return alpha
+
+    def _solve(self, current: int, mask: int, moves: int) -> int:
+        possible = (mask + Board.BOTTOM_MASK) & Board.BOARD_MASK
+        if Board.winning_cells(current, mask) & possible:
+            return (self.SIZE + 1 - moves) // 2
+        if moves == self.SIZE:
+            return 0
+
+        lower = -((self.SIZE - moves) // 2)
+        upper = (self.SIZE + 1 - moves) // 2
+        while lower < upper:
+            probe = lower + (upper - lower) // 2
+            if probe <= 0 and int(lower / 2) < probe:
+                probe = int(lower / 2)
+            elif probe >= 0 and upper // 2 > probe:
+                probe = upper // 2
+            result = self._negamax(current, mask, moves, probe, probe + 1)
+            if result <= probe:
+                upper = result
+            else:
+                lower = result
+        return lower
+
+    def _position(self, board: Board):
+        player = Board.PLAYER1 if board.move_count % 2 == 0 else Board.PLAYER2
+        mask = board.masks[Board.PLAYER1] | board.masks[Board.PLAYER2]
+        return board.masks[player], mask, board.move_count
+
+    def solve(self, board: Board) -> int:
+        return self._solve(*self._position(board))
+
+    def analyze(self, board: Board, check: Optional[Callable[[], None]] = None) -> Dict[int, int]:
+        # check is called every CHECK_INTERVAL nodes and may raise to abandon
+        # the solve; the table only ever holds completed results.
+        current, mask, moves = self._position(board)
+        scores: Dict[int, int] = {}
+        self._check = check
+        try:
+            for col in board.get_valid_moves():
+                move = (mask + Board.BOTTOM_MASK) & self.column_mask(col)
+                if Board.winning_cells(current, mask) & move:
+                    scores[col] = (self.SIZE + 1 - moves) // 2
+                else:
+                    scores[col] = -self._solve(current ^ mask, mask | move, moves + 1)
+        finally:
+            self._check = None
+        return scores
+
+    def best_moves(self, board: Board) -> List[int]:
+        scores = self.analyze(board)
+        best = max(scores.values())
+        return [col for col in self.COLUMN_ORDER if scores.get(col) == best]
+
+    @classmethod
+    def plies_to_end(cls, score: int, moves: int) -> int:
+        last_stone = cls.SIZE // 2 + 1
+        if score > 0:
+            return 2 * (last_stone - score - moves // 2) - 1
+        if score < 0:
+            return 2 * (last_stone + score - (moves + 1) // 2)
+        return cls.SIZE - moves
@@ -0,0 +1,280 @@
+import os
+import struct
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class TranspositionTable:
+    DEFAULT_ENTRIES = 1 << 18
+    ENTRY_BYTES = 160
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        if max_entries is None:
+            if max_bytes is not None:
+                max_entries = max_bytes // self.ENTRY_BYTES
+            else:
+                max_entries = self.DEFAULT_ENTRIES
+        self.size = max(1, max_entries)
+        self.slots: List[Optional[Tuple[int, float, int, int, int, int]]] = [None] * self.size
+        self.generation = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def new_search(self):
+        self.generation += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.count = 0
+
+    def probe(self, key: int) -> Optional[Tuple[float, int, int, int]]:
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry[1], entry[2], entry[3], entry[4]
+        return None
+
+    def store(self, key: int, score: float, depth: int, flag: int, best_move: int = -1):
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is None:
+            self.count += 1
+        elif entry[0] != key and entry[5] == self.generation and entry[2] > depth:
+            return
+        self.slots[index] = (key, score, depth, flag, best_move, self.generation)
+
+    def items(self) -> Iterator[Tuple[int, float, int, int, int]]:
+        for entry in self.slots:
+            if entry is not None:
+                yield entry[:5]
+
+
+class CompactTranspositionTable:
+    DEFAULT_ENTRIES = 1 << 20
+    ENTRY_BYTES = 16
+    MOVE_BITS = 3
+    FLAG_BITS = 2
+    DEPTH_BITS = 6
+    GENERATION_BITS = 8
+    SCORE_BITS = 32
+    FLAG_SHIFT = MOVE_BITS
+    DEPTH_SHIFT = FLAG_SHIFT + FLAG_BITS
+    GENERATION_SHIFT = DEPTH_SHIFT + DEPTH_BITS
+    SCORE_SHIFT = GENERATION_SHIFT + GENERATION_BITS
+    SCORE_OFFSET = 1 << (SCORE_BITS - 1)
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        if max_entries is None:
+            if max_bytes is not None:
+                max_entries = max_bytes // self.ENTRY_BYTES
+            else:
+                max_entries = self.DEFAULT_ENTRIES
+        self.size = max(1, max_entries)
+        self.keys = array('Q', bytes(8 * self.size))
+        self.entries = array('Q', bytes(8 * self.size))
+        self.generation = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def new_search(self):
+        self.generation = (self.generation + 1) % (1 << self.GENERATION_BITS)
+
+    def clear(self):
+        self.keys = array('Q', bytes(8 * self.size))
+        self.entries = array('Q', bytes(8 * self.size))
+        self.count = 0
+
+    def probe(self, key: int) -> Optional[Tuple[float, int, int, int]]:
+        index = key % self.size
+        data = self.entries[index]
+        if data == 0 or self.keys[index] != key:
+            return None
+        return self.unpack(data)
+
+    def store(self, key: int, score: float, depth: int, flag: int, best_move: int = -1):
+        index = key % self.size
+        data = self.entries[index]
+        if data == 0:
+            self.count += 1
+        elif self.keys[index] != key:
+            stored_generation = (data >> self.GENERATION_SHIFT) & ((1 << self.GENERATION_BITS) - 1)
+            stored_depth = (data >> self.DEPTH_SHIFT) & ((1 << self.DEPTH_BITS) - 1)
+            if stored_generation == self.generation and stored_depth > depth:
+                return
+        self.keys[index] = key
+        self.entries[index] = self.pack(score, depth, flag, best_move, self.generation)
+
+    def items(self) -> Iterator[Tuple[int, float, int, int, int]]:
+        for index in range(self.size):
+            data = self.entries[index]
+            if data != 0:
+                yield (self.keys[index],) + self.unpack(data)
+
+    @classmethod
+    def pack(cls, score: float, depth: int, flag: int, best_move: int, generation: int) -> int:
+        return ((int(score) + cls.SCORE_OFFSET) << cls.SCORE_SHIFT
+                | generation << cls.GENERATION_SHIFT
+                | min(depth, (1 << cls.DEPTH_BITS) - 1) << cls.DEPTH_SHIFT
+                | flag << cls.FLAG_SHIFT
+                | (best_move + 1))
+
+    @classmethod
+    def unpack(cls, data: int) -> Tuple[float, int, int, int]:
+        score = (data >> cls.SCORE_SHIFT) - cls.SCORE_OFFSET
+        depth = (data >> cls.DEPTH_SHIFT) & ((1 << cls.DEPTH_BITS) - 1)
+        flag = (data >> cls.FLAG_SHIFT) & ((1 << cls.FLAG_BITS) - 1)
+        best_move = (data & ((1 << cls.MOVE_BITS) - 1)) - 1
+        return score, depth, flag, best_move
+
+
+class SharedTranspositionTable(CompactTranspositionTable):
+    ENTRY_BYTES = 16
+    HEADER_WORDS = 2
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 name: Optional[str] = None):
+        # shared_memory is only available from Python 3.8, so it is imported
+        # here rather than at module level.
+        from multiprocessing import shared_memory
+        self.owner = name is None
+        if self.owner:
+            if max_entries is None:
+                if max_bytes is not None:
+                    max_entries = max_bytes // self.ENTRY_BYTES
+                else:
+                    max_entries = self.DEFAULT_ENTRIES
+            size = max(1, max_entries)
+            self.shm = shared_memory.SharedMemory(create=True, size=8 * (self.HEADER_WORDS + 2 * size))
+            self.words = self.shm.buf.cast('Q')
+            self.words[0] = size
+        else:
+            self.shm = self._attach(name)
+            self.words = self.shm.buf.cast('Q')
+        self.name = self.shm.name
+        self.size = self.words[0]
+        self.count = 0
+
+    @staticmethod
+    def _attach(name: str):
+        from multiprocessing import shared_memory
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            return shared_memory.SharedMemory(name=name)
+
+    @property
+    def generation(self) -> int:
+        return self.words[1]
+
+    def new_search(self):
+        if self.owner:
+            self.words[1] = (self.words[1] + 1) % (1 << self.GENERATION_BITS)
+
+    def clear(self):
+        for index in range(self.HEADER_WORDS, self.HEADER_WORDS + 2 * self.size):
+            self.words[index] = 0
+        self.count = 0
+
+    def probe(self, key: int) -> Optional[Tuple[float, int, int, int]]:
+        index = self.HEADER_WORDS + 2 * (key % self.size)
+        data = self.words[index + 1]
+        if data == 0 or self.words[index] ^ data != key:
+            return None
+        return self.unpack(data)
+
+    def store(self, key: int, score: float, depth: int, flag: int, best_move: int = -1):
+        index = self.HEADER_WORDS + 2 * (key % self.size)
+        data = self.words[index + 1]
+        generation = self.words[1]
+        if data == 0:
+            self.count += 1
+        elif self.words[index] ^ data != key:
+            stored_generation = (data >> self.GENERATION_SHIFT) & ((1 << self.GENERATION_BITS) - 1)
+            stored_depth = (data >> self.DEPTH_SHIFT) & ((1 << self.DEPTH_BITS) - 1)
+            if stored_generation == generation and stored_depth > depth:
+                return
+        data = self.pack(score, depth, flag, best_move, generation)
+        self.words[index] = key ^ data
+        self.words[index + 1] = data
+
+    def items(self) -> Iterator[Tuple[int, float, int, int, int]]:
+        for index in range(self.HEADER_WORDS, self.HEADER_WORDS + 2 * self.size, 2):
+            data = self.words[index + 1]
+            if data != 0:
+                yield (self.words[index] ^ data,) + self.unpack(data)
+
+    def __del__(self):
+        self.words.release()
+
+    def close(self):
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class TableCache:
+    MAGIC = b'C4TC'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHII')
+    ENTRY = struct.Struct('<QiBBb')
+    DEFAULT_MIN_DEPTH = 6
+    DEFAULT_MAX_ENTRIES = 1 << 16
+
+    def __init__(self, path: str, seed: int, min_depth: int = DEFAULT_MIN_DEPTH,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.seed = seed
+        self.min_depth = min_depth
+        self.max_entries = max_entries
+
+    def read(self) -> Dict[int, Tuple[int, int, int, int]]:
+        entries: Dict[int, Tuple[int, int, int, int]] = {}
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return entries
+        if len(data) < self.HEADER.size:
+            return entries
+        magic, version, seed, count = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC or version != self.VERSION or seed != self.seed:
+            return entries
+        end = self.HEADER.size + count * self.ENTRY.size
+        if len(data) != end:
+            return entries
+        try:
+            records = list(self.ENTRY.iter_unpack(data[self.HEADER.size:end]))
+        except struct.error:
+            return entries
+        for key, score, depth, flag, best_move in records:
+            entries[key] = (score, depth, flag, best_move)
+        return entries
+
+    def load_into(self, table) -> int:
+        entries = self.read()
+        for key, (score, depth, flag, best_move) in entries.items():
+            table.store(key, score, depth, flag, best_move)
+        return len(entries)
+
+    def save(self, table) -> int:
+        merged = self.read()
+        for key, score, depth, flag, best_move in table.items():
+            if depth < self.min_depth:
+                continue
+            stored = merged.get(key)
+            if stored is None or stored[1] <= depth:
+                merged[key] = (int(score), depth, flag, best_move)
+        if len(merged) > self.max_entries:
+            deepest = sorted(merged, key=lambda key: merged[key][1], reverse=True)[:self.max_entries]
+            merged = {key: merged[key] for key in deepest}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.seed, len(merged)))
+            for key in sorted(merged):
+                f.write(self.ENTRY.pack(key, *merged[key]))
+        os.replace(temp_path, self.path)
+        return len(merged)
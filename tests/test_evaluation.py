@@ -0,0 +1,130 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from ai import AI
+from board import Board
+from evaluation import IncrementalEvaluator, PatternEvaluator, ThreatAnalysis
+
+try:
+    from batch_eval import BatchEvaluator
+except ImportError:
+    BatchEvaluator = None
+
+
+def random_boards(count: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        board = Board()
+        for ply in range(rng.randint(0, Board.ROWS * Board.COLS)):
+            board.drop_piece(rng.choice(board.get_valid_moves()), Board.PLAYER1 if ply % 2 == 0 else Board.PLAYER2)
+        yield board
+
+
+def threat_cells(board: Board, player: int):
+    # One entry per window holding three of the player's stones and a gap.
+    cells = []
+    for window in IncrementalEvaluator.WINDOWS:
+        values = [board.grid[row][col] for row, col in window]
+        if values.count(player) == 3 and values.count(Board.EMPTY) == 1:
+            cells.append(window[values.index(Board.EMPTY)])
+    return cells
+
+
+def reference_threat_score(ai: AI, board: Board) -> float:
+    def score_threats(player, playable_score, favorable, unfavorable):
+        score = 0
+        for row, col in threat_cells(board, player):
+            height = Board.ROWS - 1 - row
+            distance = height - board.heights[col]
+            if distance == 0:
+                score += playable_score
+            else:
+                base, step, floor = favorable if (height % 2 == 1) == (player == Board.PLAYER1) else unfavorable
+                score += max(base - distance * step, floor)
+        return score
+
+    score = score_threats(ai.player, 200, (60, 8, 10), (30, 5, 5))
+    score -= score_threats(ai.opponent, 180, (55, 8, 8), (25, 5, 3))
+    mine = set(threat_cells(board, ai.player))
+    theirs = set(threat_cells(board, ai.opponent))
+    score += 150 * sum(1 for row, col in mine if (row - 1, col) in mine)
+    for col in range(Board.COLS):
+        if board.heights[col] < Board.ROWS - 1:
+            above = (Board.ROWS - 2 - board.heights[col], col)
+            score -= 100 * (above in theirs)
+            score += 90 * (above in mine)
+    return score
+
+
+def reference_board_score(ai: AI, board: Board) -> float:
+    score = 0
+    for col, weight in ((3, 6), (2, 3), (4, 3)):
+        score += weight * sum(1 for row in range(Board.ROWS) if board.grid[row][col] == ai.player)
+    return score + ai._evaluate_lines(board) + reference_threat_score(ai, board)
+
+
+class LineEvaluatorTest(unittest.TestCase):
+    def test_pattern_evaluator_matches_windows(self):
+        for player in (Board.PLAYER1, Board.PLAYER2):
+            ai = AI(player, line_evaluator='windows')
+            evaluator = PatternEvaluator(player)
+            for board in random_boards(300, seed=player):
+                self.assertEqual(evaluator.evaluate(board), ai._evaluate_lines(board), board.move_history)
+
+    def test_incremental_evaluator_matches_windows(self):
+        for player in (Board.PLAYER1, Board.PLAYER2):
+            ai = AI(player, line_evaluator='windows')
+            for board in random_boards(100, seed=10 + player):
+                history = list(board.move_history)
+                evaluator = IncrementalEvaluator(player)
+                evaluator.reset(Board())
+                replay = Board()
+                for ply, col in enumerate(history):
+                    mover = Board.PLAYER1 if ply % 2 == 0 else Board.PLAYER2
+                    evaluator.add(replay.get_row_for_column(col), col, mover)
+                    replay.drop_piece(col, mover)
+                    self.assertEqual(evaluator.score, ai._evaluate_lines(replay), replay.move_history)
+                while replay.move_history:
+                    col = replay.move_history[-1]
+                    row = replay.get_row_for_column(col) + 1
+                    mover = replay.grid[row][col]
+                    replay.undo_move()
+                    evaluator.remove(row, col, mover)
+                    self.assertEqual(evaluator.score, ai._evaluate_lines(replay), replay.move_history)
+                self.assertEqual(evaluator.codes, [0] * len(IncrementalEvaluator.WINDOWS))
+
+
+class ThreatScoreTest(unittest.TestCase):
+    def test_threat_analysis_matches_window_scan(self):
+        for player in (Board.PLAYER1, Board.PLAYER2):
+            ai = AI(player, line_evaluator='windows')
+            for board in random_boards(300, seed=20 + player):
+                analysis = ThreatAnalysis(board)
+                score = ai._evaluate_threats(board, analysis) + ai._detect_zugzwang(board, analysis)
+                self.assertEqual(score, reference_threat_score(ai, board), board.move_history)
+
+    def test_board_score_matches_window_scan(self):
+        for player in (Board.PLAYER1, Board.PLAYER2):
+            for line_evaluator in ('windows', 'pattern'):
+                ai = AI(player, line_evaluator=line_evaluator)
+                for board in random_boards(100, seed=30 + player):
+                    self.assertEqual(ai._evaluate_board(board), reference_board_score(ai, board), board.move_history)
+
+    @unittest.skipIf(BatchEvaluator is None, "requires numpy")
+    def test_batch_evaluator_matches_window_scan(self):
+        for player in (Board.PLAYER1, Board.PLAYER2):
+            ai = AI(player, line_evaluator='windows')
+            evaluator = BatchEvaluator(player)
+            boards = list(random_boards(300, seed=40 + player))
+            expected = [reference_board_score(ai, board) for board in boards]
+            self.assertEqual(evaluator.evaluate(BatchEvaluator.stack([board.grid for board in boards])).tolist(),
+                             expected)
+            self.assertEqual(evaluator.evaluate_boards(boards), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from board import Board
+from solver import Solver
+
+
+def brute_force(board: Board, player: int):
+    # (result, plies) for the side to move: result is 1, 0 or -1, and plies
+    # counts moves to the end with the fastest win and slowest loss.
+    best = None
+    for col in board.get_valid_moves():
+        result = move_result(board, col, player)
+        key = (result[0], -result[1] if result[0] > 0 else result[1])
+        if best is None or key > best[0]:
+            best = (key, result)
+    return best[1]
+
+
+def move_result(board: Board, col: int, player: int):
+    board.drop_piece(col, player)
+    if board.check_last_move_winner() != Board.EMPTY:
+        result = (1, 1)
+    elif board.is_full():
+        result = (0, 1)
+    else:
+        outcome, plies = brute_force(board, Board.PLAYER1 if player == Board.PLAYER2 else Board.PLAYER2)
+        result = (-outcome, plies + 1)
+    board.undo_move()
+    return result
+
+
+def endgame_positions(count: int, seed: int):
+    rng = random.Random(seed)
+    while count > 0:
+        board = Board()
+        for ply in range(Board.ROWS * Board.COLS - rng.randint(4, 9)):
+            board.drop_piece(rng.choice(board.get_valid_moves()), Board.PLAYER1 if ply % 2 == 0 else Board.PLAYER2)
+            if board.check_last_move_winner() != Board.EMPTY:
+                break
+        else:
+            count -= 1
+            yield board
+
+
+class SolverTest(unittest.TestCase):
+    def test_analyze_matches_brute_force(self):
+        for board in endgame_positions(40, seed=2):
+            player = Board.PLAYER1 if board.move_count % 2 == 0 else Board.PLAYER2
+            scores = Solver().analyze(board)
+            self.assertEqual(sorted(scores), board.get_valid_moves())
+            for col, score in scores.items():
+                result, plies = move_result(board, col, player)
+                self.assertEqual((score > 0) - (score < 0), result, (board.move_history, col))
+                self.assertEqual(Solver.plies_to_end(score, board.move_count), plies, (board.move_history, col))
+
+    def test_solve_matches_brute_force(self):
+        for board in endgame_positions(40, seed=3):
+            player = Board.PLAYER1 if board.move_count % 2 == 0 else Board.PLAYER2
+            score = Solver().solve(board)
+            result, plies = brute_force(board, player)
+            self.assertEqual((score > 0) - (score < 0), result, board.move_history)
+            self.assertEqual(Solver.plies_to_end(score, board.move_count), plies, board.move_history)
+
+    def test_check_abandons_analysis(self):
+        class Stop(Exception):
+            pass
+
+        def check():
+            raise Stop()
+
+        for board in endgame_positions(40, seed=4):
+            reference = Solver()
+            expected = reference.analyze(board)
+            if reference.nodes > 1:
+                break
+        solver = Solver()
+        solver.CHECK_INTERVAL = 1
+        with self.assertRaises(Stop):
+            solver.analyze(board, check)
+        self.assertEqual(solver.analyze(board), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
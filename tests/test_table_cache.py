@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from transposition import TableCache, TranspositionTable
+
+
+class TableCacheTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.cache = TableCache(self.path, seed=1, min_depth=0)
+        table = TranspositionTable(max_entries=64)
+        table.store(5, 12, 8, 0, 3)
+        table.store(9, -40, 7, 1, 2)
+        self.cache.save(table)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        self.assertEqual(self.cache.read(), {5: (12, 8, 0, 3), 9: (-40, 7, 1, 2)})
+
+    def test_trailing_bytes_are_ignored(self):
+        with open(self.path, 'ab') as f:
+            f.write(b'\0\0')
+        self.assertEqual(self.cache.read(), {})
+
+    def test_extra_records_are_ignored(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with open(self.path, 'ab') as f:
+            f.write(data[-TableCache.ENTRY.size:])
+        self.assertEqual(self.cache.read(), {})
+
+    def test_corrupt_file_is_rewritten(self):
+        with open(self.path, 'ab') as f:
+            f.write(b'\0\0')
+        table = TranspositionTable(max_entries=64)
+        self.assertEqual(self.cache.load_into(table), 0)
+        table.store(7, 1, 9, 0, 4)
+        self.cache.save(table)
+        self.assertEqual(self.cache.read(), {7: (1, 9, 0, 4)})
+
+
+if __name__ == '__main__':
+    unittest.main()